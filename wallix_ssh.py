@@ -1,40 +1,127 @@
 # wallix_ssh.py created by Mickael ASSELINE (PAPAMICA)
 # https://github.com/PAPAMICA/wallix_ssh
-import requests
-from requests.auth import HTTPBasicAuth
-import urllib3
 import json
+import os
+import re
 import subprocess
-import argparse
 import sys
-from typing import List, Dict
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Dict, Optional
+from datetime import datetime
 from pathlib import Path
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.table import Table
-from rich.logging import RichHandler
 import logging
 import getpass
 import base64
 import gzip
 import configparser
+import functools
+import pickle
+import time
+
+# orjson is much faster than stdlib json for the cache/history payloads;
+# ujson is a slower but more widely packaged second choice. Keep the tool
+# working with neither installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Exceptions raised by whichever HTTP client is in use; populated when the
+# HTTP stack is imported on first API call (see WallixManager._init_http)
+HTTP_ERRORS = ()
+
+def json_loads(data):
+    """Parse JSON from str or bytes with the fastest available parser"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        return ujson.loads(data)
+    return json.loads(data)
+
+def json_dumps(data) -> bytes:
+    """Serialize to compact JSON bytes with the fastest available parser"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    if ujson is not None:
+        return ujson.dumps(data).encode('utf-8')
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+# Characters that make a --filter expression a real regex
+_REGEX_METACHARS = frozenset('\\^$.|?*+()[]{}')
+
+def compile_filter(expr: str):
+    """Return a match predicate for a --filter expression.
+
+    Plain substrings skip the regex engine: a str containment test on the
+    pre-lowered search blob is far cheaper than the regex VM.
+    """
+    if not _REGEX_METACHARS.intersection(expr):
+        needle = expr.lower()
+        return lambda text, n=needle: n in text
+    return re.compile(expr, re.IGNORECASE).search
+
+@dataclass(frozen=True)
+class ParsedFilters:
+    """CLI device filters, normalized once after argument parsing"""
+    filter_test: Optional[Callable[[str], object]] = None  # predicate over the device _blob
+    services: Optional[frozenset] = None  # required service names, uppercased
+    tags: Optional[frozenset] = None  # required key:value tags, lowercased
+
+    @classmethod
+    def from_args(cls, filter_expr: str = None, services: str = None, tags: str = None) -> "ParsedFilters":
+        return cls(
+            filter_test=compile_filter(filter_expr) if filter_expr else None,
+            services=frozenset(s.strip().upper() for s in services.split(',')) if services else None,
+            tags=frozenset(t.strip().lower() for t in tags.split(',')) if tags else None,
+        )
+
+    def __bool__(self) -> bool:
+        return (self.filter_test is not None
+                or self.services is not None
+                or self.tags is not None)
+
+def prompt_yes_no(default: str = 'y') -> str:
+    """Read a y/n answer from stdin, defaulting on empty input or EOF"""
+    line = sys.stdin.readline()
+    return (line.strip().lower() or default) if line else default
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file atomically so a crash never leaves it half-written"""
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
 
 # Load configuration from config.ini
+@functools.lru_cache(maxsize=None)
 def load_config():
-    """Load configuration from config.ini file"""
-    config = configparser.ConfigParser()
+    """Load configuration from config.ini file (parsed at most once)"""
     script_dir = Path(__file__).parent.absolute()
     config_file = script_dir / 'config.ini'
-    
+
     if not config_file.exists():
         print(f"Error: Configuration file not found: {config_file}", file=sys.stderr)
         print("Please create a config.ini file in the script directory", file=sys.stderr)
         sys.exit(1)
-    
+
+    # configparser is slow for a startup path that runs on every invocation;
+    # reuse a pickled copy of the parsed config while config.ini is unchanged
+    mtime = config_file.stat().st_mtime
+    config_cache = config_file.with_suffix('.cache')
+    try:
+        if config_cache.exists():
+            cached_mtime, cached_config = pickle.loads(config_cache.read_bytes())
+            if cached_mtime == mtime:
+                return cached_config
+    except Exception:
+        pass
+
+    config = configparser.ConfigParser()
     config.read(config_file)
-    
+
     cache_file = config.get('wallix', 'cache_file', fallback='')
     if not cache_file:
         cache_file = str(Path.home() / '.wallix_cache')
@@ -43,53 +130,373 @@ def load_config():
     deploy_files_str = config.get('wallix', 'deploy_files', fallback='')
     deploy_files = [f.strip() for f in deploy_files_str.split(',') if f.strip()] if deploy_files_str else []
     
-    return {
+    result = {
         'username': config.get('wallix', 'username', fallback=''),
         'password': config.get('wallix', 'password', fallback=''),
         'base_url': config.get('wallix', 'base_url', fallback=''),
         'cache_file': cache_file,
-        'deploy_files': deploy_files
+        'deploy_files': deploy_files,
+        'cache_ttl': config.getint('wallix', 'cache_ttl', fallback=86400)
     }
 
-# Load configuration
-CONFIG = load_config()
-WALLIX_USERNAME = CONFIG['username']
-WALLIX_PASSWORD = CONFIG['password']
-WALLIX_BASE_URL = CONFIG['base_url']
-WALLIX_CACHE_FILE = CONFIG['cache_file']
-WALLIX_DEPLOY_FILES = CONFIG['deploy_files']
+    try:
+        config_cache.write_bytes(pickle.dumps((mtime, result), protocol=5))
+    except OSError:
+        pass
+    return result
 
 # Configure logging
+def _make_log_handler() -> logging.Handler:
+    """RichHandler on a TTY, plain stderr handler otherwise"""
+    if sys.stderr.isatty():
+        try:
+            from rich.logging import RichHandler
+            return RichHandler(rich_tracebacks=True, markup=True)
+        except ImportError:
+            pass
+    return logging.StreamHandler()
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(message)s",
     datefmt="[%X]",
-    handlers=[RichHandler(rich_tracebacks=True, markup=True)]
+    handlers=[_make_log_handler()]
 )
 logger = logging.getLogger("wallix")
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Catalog size from which the SQLite device index is built and queried;
+# below this, Python-level set filtering is already fast enough
+SQLITE_INDEX_MIN_DEVICES = 5000
+
+# Page size and worker count for the paginated catalog fetch; the refresh
+# is latency-bound on HTTP round-trips, so pages past the first are
+# fetched in parallel over the pooled session
+DEVICES_PAGE_SIZE = 500
+DEVICES_FETCH_WORKERS = 8
+
+# How long cached API session cookies stay usable; kept well under the
+# Bastion's own session timeout so a stale cookie is the exception
+SESSION_COOKIE_TTL = 600
+
+# Icon per service, first match wins
+SERVICE_ICONS = (
+    ("RDP", "🪟 "),
+    ("SSH", "🐧 "),
+)
+
+# Column spec shared by every device table: (header, style)
+DEVICE_TABLE_COLUMNS = (
+    ("Name", "cyan"),
+    ("Host", "green"),
+    ("Services", "yellow"),
+    ("Tags", "blue"),
+    ("Description", "white"),
+)
 
 class WallixManager:
     def __init__(self):
-        self.base_url = WALLIX_BASE_URL
-        self.username = WALLIX_USERNAME
-        self.password = WALLIX_PASSWORD
+        config = load_config()
+        self.base_url = config['base_url']
+        self.username = config['username']
+        self.password = config['password']
+        self.deploy_files = config['deploy_files']
         self.api_endpoint = f'{self.base_url}/api'
         self.devices_endpoint = f'{self.base_url}/api/devices'
-        self.session = requests.Session()
-        self.session.trust_env = False
+        # HTTP stack (requests/urllib3, optionally httpx) is heavy to
+        # import; it is loaded on the first API call via the http property
+        self.session = None
+        self.client = None
+        self._http = None
         # Use configured cache file path or default
-        self.cache_file = Path(WALLIX_CACHE_FILE).expanduser()
+        self.cache_file = Path(config['cache_file']).expanduser()
+        # Binary cache (pickle) next to the legacy JSON path
+        self.cache_file_pkl = self.cache_file.with_suffix('.pkl')
+        # SQLite service/tag index for very large catalogs
+        self.device_index_file = self.cache_file.with_suffix('.sqlite')
         self.history_file = Path.home() / '.wallix_history'
-        self.cache_duration = timedelta(days=7)
-        self.console = Console()
+        # Parsed history sidecar, keyed by the history file's mtime
+        self.history_cache_file = Path.home() / '.wallix_history.cache'
+        # base64 gzip blobs of the deploy files, keyed by path and
+        # validated by (mtime, size); persisted across runs
+        self.deploy_cache_file = Path.home() / '.wallix_deploy_cache'
+        # API session cookies from the previous run (0600), so a fresh
+        # invocation can skip the auth round-trip
+        self.session_cache_file = Path.home() / '.wallix_session'
+        self._session_restored = False
+        self._deploy_cache: Optional[Dict] = None
+        self._deploy_cache_dirty = False
+        # Cache age, in seconds, past which a background refresh is started
+        self.cache_ttl = config['cache_ttl']
+        # Parsed device list, memoized for the lifetime of the process
+        self._devices_cache: Optional[List[Dict]] = None
+        # Name -> device index for O(1) lookups
+        self._devices_by_name: Optional[Dict[str, Dict]] = None
+        # rich Console, created lazily on first render
+        self._console = None
         # Extract hostname from base_url for SSH commands
         from urllib.parse import urlparse
         parsed_url = urlparse(self.base_url)
         self.bastion_host = parsed_url.netloc or parsed_url.path
 
+    def _init_http(self) -> None:
+        """Import the HTTP stack and build the API client on first use"""
+        global HTTP_ERRORS
+        import requests
+        from requests.adapters import HTTPAdapter
+        import urllib3
+        from urllib3.util.retry import Retry
+
+        # Disable SSL warnings
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        # httpx brings HTTP/2 and lower per-request overhead than requests;
+        # fall back to the requests session when it is not installed
+        try:
+            import httpx
+        except ImportError:
+            httpx = None
+
+        HTTP_ERRORS = (requests.exceptions.RequestException,)
+        if httpx is not None:
+            HTTP_ERRORS += (httpx.HTTPError,)
+
+        self.session = requests.Session()
+        self.session.trust_env = False
+        # Pool connections so keep-alive and TLS reuse apply across calls
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=10,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.verify = False
+        # Prefer httpx when installed (HTTP/2 when the h2 extra is present)
+        if httpx is not None:
+            try:
+                self.client = httpx.Client(http2=True, verify=False, timeout=10)
+            except ImportError:
+                self.client = httpx.Client(verify=False, timeout=10)
+        self._http = self.client if self.client is not None else self.session
+        # Authenticate once at client level instead of per request
+        self._apply_auth()
+        self._load_session_cookies()
+
+    @property
+    def http(self):
+        """API client, constructed on the first HTTP call"""
+        if self._http is None:
+            self._init_http()
+        return self._http
+
+    def _apply_auth(self) -> None:
+        """Propagate current credentials to the HTTP client"""
+        if self._http is None:
+            # _init_http applies the credentials once the client exists
+            return
+        if not self.password:
+            # No credentials yet: send cookie-only requests clean rather
+            # than an empty Authorization header the Bastion would reject
+            return
+        from requests.auth import HTTPBasicAuth
+        self.session.auth = HTTPBasicAuth(self.username, self.password)
+        if self.client is not None:
+            self.client.auth = (self.username, self.password)
+
+    def _ensure_password(self) -> None:
+        """Prompt for the password if not configured"""
+        if not self.password:
+            self.password = getpass.getpass("Wallix password: ")
+            self._apply_auth()
+
+    def _load_session_cookies(self) -> None:
+        """Reuse the previous run's API session cookies while still fresh
+
+        A live session cookie lets the Bastion skip credential
+        validation, and lets us skip the password prompt entirely when
+        none is configured.
+        """
+        try:
+            if time.time() - self.session_cache_file.stat().st_mtime > SESSION_COOKIE_TTL:
+                self.session_cache_file.unlink(missing_ok=True)
+                return
+            cookies = pickle.loads(self.session_cache_file.read_bytes())
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            return
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value)
+            if self.client is not None:
+                self.client.cookies.set(name, value)
+        self._session_restored = True
+
+    def _save_session_cookies(self) -> None:
+        """Persist the API session cookies for the next invocation"""
+        jar = self.client.cookies if self.client is not None else self.session.cookies
+        cookies = dict(jar)
+        if not cookies:
+            return
+        # Session cookies are credentials: create owner-only from the
+        # start rather than chmod-ing after the write
+        tmp = self.session_cache_file.with_suffix('.tmp')
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pickle.dumps(cookies, protocol=5))
+            os.replace(tmp, self.session_cache_file)
+        except OSError:
+            pass
+
+    def _evict_session_cookies(self) -> None:
+        """Drop the cached cookies after the server rejected them"""
+        try:
+            self.session_cache_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+        self.session.cookies.clear()
+        if self.client is not None:
+            self.client.cookies.clear()
+        self._session_restored = False
+
+    def _request_with_auth_retry(self, method: str, url: str, prompt: bool = True, **kwargs):
+        """Issue an API request, re-prompting for the password once on a 401
+
+        prompt=False makes the call strictly non-interactive (for
+        background threads): a 401 is returned as-is, without touching
+        the stored password or reading from stdin.
+        """
+        http = self.http  # initializes the stack and restores any cached session
+        # A restored session cookie authenticates on its own; only insist
+        # on a password when there is no session to reuse
+        if not self._session_restored and prompt:
+            self._ensure_password()
+        response = getattr(http, method)(url, **kwargs)
+        if response.status_code == 401 and prompt:
+            if self._session_restored:
+                # Stale cookie: fall back to credentials
+                self._evict_session_cookies()
+                self._ensure_password()
+            else:
+                logger.error("Authentication error")
+                self.password = ''
+                self._ensure_password()
+            response = getattr(http, method)(url, **kwargs)
+        if response.status_code < 400:
+            self._save_session_cookies()
+        return response
+
+    @property
+    def console(self):
+        """rich Console, constructed on first access"""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def _read_cache_file(self) -> Dict:
+        """Read the binary cache, migrating a legacy cache if needed"""
+        legacy_json = False
+        if self.cache_file_pkl.exists():
+            cache_data = pickle.loads(self.cache_file_pkl.read_bytes())
+        elif self.cache_file.exists():
+            # One-shot migration from the old JSON cache file
+            cache_data = json_loads(self.cache_file.read_bytes())
+            cache_data['timestamp'] = datetime.fromisoformat(cache_data['timestamp']).timestamp()
+            legacy_json = True
+        else:
+            return None
+
+        if cache_data['devices'] and 'nom' in cache_data['devices'][0]:
+            # Migrate the old simplified schema to the API shape
+            cache_data['devices'] = [{
+                'device_name': device['nom'],
+                'host': device['hote'],
+                'services': [{'service_name': s} for s in device['services']],
+                'tags': [{'key': t.split(':')[0], 'value': t.split(':')[1]} for t in device.get('tags', [])],
+                'description': device.get('description', '')
+            } for device in cache_data['devices']]
+            self._write_cache_file(cache_data)
+
+        if legacy_json:
+            self.cache_file.unlink()
+        return cache_data
+
+    def _write_cache_file(self, cache_data: Dict) -> None:
+        """Write the binary cache file"""
+        atomic_write_bytes(self.cache_file_pkl, pickle.dumps(cache_data, protocol=5))
+        self._build_device_index(cache_data['devices'])
+
+    def _build_device_index(self, devices: List[Dict]) -> None:
+        """Rebuild the SQLite service/tag index for large catalogs"""
+        try:
+            if len(devices) < SQLITE_INDEX_MIN_DEVICES:
+                self.device_index_file.unlink(missing_ok=True)
+                return
+
+            import sqlite3
+            tmp = Path(str(self.device_index_file) + '.tmp')
+            tmp.unlink(missing_ok=True)
+            con = sqlite3.connect(tmp)
+            try:
+                con.execute("CREATE TABLE device_services(device_name TEXT, service TEXT)")
+                con.execute("CREATE TABLE device_tags(device_name TEXT, tag TEXT)")
+                con.executemany(
+                    "INSERT INTO device_services VALUES (?, ?)",
+                    ((d['device_name'], s['service_name'].upper())
+                     for d in devices for s in d.get('services', []))
+                )
+                con.executemany(
+                    "INSERT INTO device_tags VALUES (?, ?)",
+                    ((d['device_name'], f"{t['key']}:{t['value']}".lower())
+                     for d in devices for t in d.get('tags', []))
+                )
+                con.execute("CREATE INDEX idx_device_services ON device_services(service, device_name)")
+                con.execute("CREATE INDEX idx_device_tags ON device_tags(tag, device_name)")
+                con.commit()
+            finally:
+                con.close()
+            os.replace(tmp, self.device_index_file)
+        except Exception as e:
+            logger.error(f"Error building device index: {e}")
+
+    def _index_lookup(self, filters: ParsedFilters, device_count: int) -> Optional[frozenset]:
+        """Resolve --services/--tags filters through the SQLite index.
+
+        Returns the matching device names, or None when the index does not
+        apply (small catalog, no exact filters, or missing index file).
+        """
+        if device_count < SQLITE_INDEX_MIN_DEVICES:
+            return None
+        if filters.services is None and filters.tags is None:
+            return None
+        if not self.device_index_file.exists():
+            return None
+
+        try:
+            import sqlite3
+            con = sqlite3.connect(f"file:{self.device_index_file}?mode=ro", uri=True)
+            try:
+                names = None
+                for table, column, required in (
+                    ("device_services", "service", filters.services),
+                    ("device_tags", "tag", filters.tags),
+                ):
+                    if not required:
+                        continue
+                    placeholders = ",".join("?" * len(required))
+                    rows = con.execute(
+                        f"SELECT device_name FROM {table} WHERE {column} IN ({placeholders}) "
+                        f"GROUP BY device_name HAVING COUNT(DISTINCT {column}) = ?",
+                        (*required, len(required))
+                    ).fetchall()
+                    matched = {row[0] for row in rows}
+                    names = matched if names is None else names & matched
+                return frozenset(names) if names is not None else None
+            finally:
+                con.close()
+        except Exception as e:
+            logger.error(f"Error querying device index: {e}")
+            return None
+
     def load_cache(self, force_refresh: bool = False) -> List[Dict]:
         """Load devices from cache"""
         if force_refresh:
@@ -97,74 +504,79 @@ class WallixManager:
             return None
 
         try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    cache_age = datetime.now() - datetime.fromisoformat(cache_data['timestamp'])
-
-                    # Calculate different time units
-                    total_minutes = int(cache_age.total_seconds() / 60)
-                    hours = total_minutes // 60
-                    minutes = total_minutes % 60
-                    days = hours // 24
-                    hours = hours % 24
-
-                    # Formatted display
-                    age_str = ""
-                    if days > 0:
-                        age_str += f"{days} day{'s' if days > 1 else ''}, "
-                    if hours > 0:
-                        age_str += f"{hours} hour{'s' if hours > 1 else ''}, "
-                    age_str += f"{minutes} minute{'s' if minutes > 1 else ''}"
-
-                    logger.info(f"Cache found (age: {age_str})")
-                    return cache_data['devices']
+            cache_data = self._read_cache_file()
+            if cache_data is not None:
+                cache_age = datetime.now() - datetime.fromtimestamp(cache_data['timestamp'])
+
+                # Calculate different time units
+                total_minutes = int(cache_age.total_seconds() / 60)
+                hours = total_minutes // 60
+                minutes = total_minutes % 60
+                days = hours // 24
+                hours = hours % 24
+
+                # Formatted display
+                age_str = ""
+                if days > 0:
+                    age_str += f"{days} day{'s' if days > 1 else ''}, "
+                if hours > 0:
+                    age_str += f"{hours} hour{'s' if hours > 1 else ''}, "
+                age_str += f"{minutes} minute{'s' if minutes > 1 else ''}"
+
+                logger.info(f"Cache found (age: {age_str})")
+                return cache_data['devices']
             else:
                 logger.info("No cache found")
         except Exception as e:
             logger.error(f"Error loading cache: {e}")
         return None
 
-    def save_cache(self, devices: List[Dict]) -> None:
-        """Save devices to cache"""
+    def save_cache(self, devices: List[Dict], diff: bool = False) -> None:
+        """Save devices to cache, optionally reporting newly added machines"""
         try:
-            # Retrieve old cache for comparison
+            # Retrieve old cache for comparison, only when the diff is wanted:
+            # it costs a full extra cache read per save
             old_devices = []
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    old_cache_data = json.load(f)
+            if diff:
+                old_cache_data = self._read_cache_file()
+                if old_cache_data is not None:
                     old_devices = old_cache_data['devices']
 
-            # Simplified data format
+            # Keep only the fields we use, in the API shape so the cached
+            # read needs no per-device rebuild
             simplified_devices = []
             for device in devices:
                 simplified_device = {
-                    'nom': device['device_name'],
-                    'hote': device['host'],
-                    'services': [s['service_name'] for s in device.get('services', [])],
-                    'tags': [f"{tag['key']}:{tag['value']}" for tag in device.get('tags', [])],
+                    'device_name': device['device_name'],
+                    'host': device['host'],
+                    'services': [{'service_name': s['service_name']} for s in device.get('services', [])],
+                    'tags': [{'key': tag['key'], 'value': tag['value']} for tag in device.get('tags', [])],
                     'description': device.get('description', '')
                 }
                 simplified_devices.append(simplified_device)
 
             cache_data = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': time.time(),
                 'devices': simplified_devices
             }
 
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            self._write_cache_file(cache_data)
+            # On-disk cache changed, drop the in-process memo
+            self._devices_cache = None
             logger.info(f"Cache saved ({len(devices)} machines)")
 
             # Compare with old cache
             if old_devices:
-                old_device_names = {device['nom'] for device in old_devices}
-                new_devices = [device for device in simplified_devices if device['nom'] not in old_device_names]
+                old_device_names = {device['device_name'] for device in old_devices}
+                new_devices = [device for device in simplified_devices if device['device_name'] not in old_device_names]
 
                 if new_devices:
                     if len(new_devices) > 10:
                         logger.info(f"{len(new_devices)} new machines added")
                     else:
+                        from rich.panel import Panel
+                        from rich.table import Table
+
                         table = Table(show_header=True, header_style="bold magenta")
                         table.add_column("Name", style="cyan")
                         table.add_column("Host", style="green")
@@ -173,12 +585,12 @@ class WallixManager:
                         table.add_column("Description", style="white")
 
                         for device in new_devices:
-                            services = ", ".join(device['services'])
-                            tags = ", ".join(device['tags'])
+                            services = ", ".join(s['service_name'] for s in device['services'])
+                            tags = ", ".join(f"{tag['key']}:{tag['value']}" for tag in device['tags'])
                             description = device['description']
                             table.add_row(
-                                device['nom'],
-                                device['hote'],
+                                device['device_name'],
+                                device['host'],
                                 services,
                                 tags,
                                 description
@@ -192,105 +604,248 @@ class WallixManager:
 
     def authenticate(self) -> bool:
         """Authenticate to bastion"""
-        if not self.password:
-            self.password = getpass.getpass("Wallix password: ")
+        self._ensure_password()
         try:
+            from rich.progress import Progress, SpinnerColumn, TextColumn
+
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 transient=True,
             ) as progress:
                 progress.add_task(description="Authenticating...")
-                auth_response = self.session.post(
+                auth_response = self.http.post(
                     self.api_endpoint,
-                    auth=HTTPBasicAuth(self.username, self.password),
-                    verify=False,
                     timeout=10
                 )
             return auth_response.status_code == 204
-        except requests.exceptions.RequestException:
+        except HTTP_ERRORS:
             return False
 
-    def get_devices(self, force_refresh: bool = False) -> List[Dict]:
+    def _prepare_devices(self, devices: List[Dict]) -> List[Dict]:
+        """Attach precomputed search fields to each device"""
+        for device in devices:
+            # Lowercased composite of the searchable fields, so a query is
+            # one substring test instead of three .lower() + tests
+            device['_blob'] = (
+                device['device_name'] + '\x1f' +
+                device['host'] + '\x1f' +
+                (device.get('description') or '')
+            ).lower()
+            # Lowercased "key:value" tags and uppercased service names as
+            # frozensets, so filters are subset tests instead of list scans
+            device['_tags_lc'] = frozenset(f"{tag['key']}:{tag['value']}".lower() for tag in device.get('tags', []))
+            device['_services_uc'] = frozenset(s['service_name'].upper() for s in device.get('services', []))
+            # Display strings, rendered identically in every table
+            device['_services_str'] = ", ".join(s['service_name'] for s in device.get('services', []))
+            device['_tags_str'] = ", ".join(f"{tag['key']}:{tag['value']}" for tag in device.get('tags', []))
+        self._devices_by_name = {device['device_name']: device for device in devices}
+        return devices
+
+    def find_device(self, device_name: str) -> Optional[Dict]:
+        """Find a device by exact name through the name index"""
+        if self._devices_by_name is None:
+            self.get_devices()
+        return (self._devices_by_name or {}).get(device_name)
+
+    def get_devices(self, force_refresh: bool = False, show_new: bool = False) -> List[Dict]:
         """Retrieve list of devices"""
         if not force_refresh:
+            if self._devices_cache is not None:
+                return self._devices_cache
+
             cached_devices = self.load_cache(force_refresh)
             if cached_devices is not None:
-                # Convert cache data to expected format
-                return [{
-                    'device_name': device['nom'],
-                    'host': device['hote'],
-                    'services': [{'service_name': s} for s in device['services']],
-                    'tags': [{'key': t.split(':')[0], 'value': t.split(':')[1]} for t in device.get('tags', [])],
-                    'description': device.get('description', '')
-                } for device in cached_devices]
+                # Cache is already stored in the API shape
+                self._devices_cache = self._prepare_devices(cached_devices)
+                self._maybe_renew_cache()
+                return self._devices_cache
 
         logger.info("Retrieving all machines...")
         try:
-            # Retrieve all machines in a single request
-            devices_response = self.session.get(
-                f"{self.devices_endpoint}?limit=-1",
-                auth=HTTPBasicAuth(self.username, self.password),
-                verify=False,
-                timeout=10
-            )
-
-            if devices_response.status_code in [200, 206]:
-                devices = devices_response.json()
-                total_machines = len(devices)
-                if force_refresh:
-                    logger.info(f"Retrieval completed. Total: {total_machines} machines")
-                else:
-                    logger.info(f"Retrieval completed. Total: {total_machines} machines")
-                self.save_cache(devices)
-                return devices
-            else:
+            devices = self._fetch_all_devices()
+            if devices is None:
                 logger.error("Error retrieving machines")
                 return []
-        except requests.exceptions.RequestException as e:
+
+            logger.info(f"Retrieval completed. Total: {len(devices)} machines")
+            self.save_cache(devices, diff=show_new)
+            self._devices_cache = self._prepare_devices(devices)
+            return devices
+        except HTTP_ERRORS as e:
             logger.error(f"Request error: {e}")
             return []
 
-    def get_service_icon(self, services: List[str]) -> str:
-        """Returns appropriate icon based on services"""
-        if "RDP" in services:
-            return "🪟 "
-        elif "SSH" in services:
-            return "🐧 "
+    def _refresh_cache(self) -> None:
+        """Fetch the catalog and rewrite the cache file, quietly on failure
+
+        Runs in a background thread, so the fetch is non-interactive: a
+        rejected password aborts the refresh instead of prompting.
+        """
+        try:
+            start_mtime = self._cache_mtime()
+            devices = self._fetch_all_devices(prompt=False)
+            if devices is None:
+                return
+            if self._cache_mtime() != start_mtime:
+                # The cache was rewritten while we were fetching (e.g. by
+                # update_device); don't overwrite the newer data
+                return
+            self.save_cache(devices)
+        except Exception as e:
+            logger.debug(f"Background cache refresh failed: {e}")
+
+    def _cache_mtime(self) -> Optional[float]:
+        """mtime of the binary cache, None when it does not exist"""
+        try:
+            return self.cache_file_pkl.stat().st_mtime
+        except OSError:
+            return None
+
+    def _maybe_renew_cache(self) -> None:
+        """Start a background refresh once the cache is past its TTL
+
+        The caller still gets the stale list immediately: staleness is
+        bounded by cache_ttl without ever paying refresh latency in the
+        foreground. Skipped when no password is configured, since a
+        background thread cannot prompt for one.
+        """
+        if not self.password:
+            return
+        try:
+            cache_age = time.time() - self.cache_file_pkl.stat().st_mtime
+        except OSError:
+            return
+        if cache_age <= self.cache_ttl:
+            return
+        import threading
+        logger.info("Cache is stale, refreshing in the background...")
+        threading.Thread(target=self._refresh_cache, name="cache-refresh").start()
+
+    def _devices_page_url(self, offset: int) -> str:
+        """URL for one page of the catalog, asking only for the kept fields"""
+        return (
+            f"{self.devices_endpoint}?limit={DEVICES_PAGE_SIZE}&offset={offset}"
+            "&fields=device_name,host,services,tags,description"
+        )
+
+    def _fetch_devices_page(self, offset: int) -> Optional[List[Dict]]:
+        """Fetch one page of the catalog, None on an HTTP error"""
+        response = self.http.get(
+            self._devices_page_url(offset),
+            headers={'Accept-Encoding': 'gzip'},
+            timeout=10
+        )
+        if response.status_code not in (200, 206):
+            return None
+        # Parse the raw bytes with orjson instead of response.json()
+        return json_loads(response.content)
+
+    def _fetch_all_devices(self, prompt: bool = True) -> Optional[List[Dict]]:
+        """Fetch the whole catalog, paging in parallel past the first page"""
+        # The first page goes through the auth retry so a wrong password is
+        # re-prompted before any workers are spawned
+        first_response = self._request_with_auth_retry(
+            'get',
+            self._devices_page_url(0),
+            prompt=prompt,
+            headers={'Accept-Encoding': 'gzip'},
+            timeout=10
+        )
+        if first_response.status_code not in (200, 206):
+            return None
+        devices = json_loads(first_response.content)
+        if len(devices) < DEVICES_PAGE_SIZE:
+            return devices
+
+        # More pages to go: fetch them in parallel waves over the pooled
+        # session until one comes back short
+        from concurrent.futures import ThreadPoolExecutor
+
+        offset = DEVICES_PAGE_SIZE
+        with ThreadPoolExecutor(max_workers=DEVICES_FETCH_WORKERS) as pool:
+            while True:
+                offsets = [offset + i * DEVICES_PAGE_SIZE for i in range(DEVICES_FETCH_WORKERS)]
+                pages = list(pool.map(self._fetch_devices_page, offsets))
+                for page in pages:
+                    if page is None:
+                        return None
+                    devices.extend(page)
+                    if len(page) < DEVICES_PAGE_SIZE:
+                        return devices
+                offset += DEVICES_FETCH_WORKERS * DEVICES_PAGE_SIZE
+
+    def get_service_icon(self, services) -> str:
+        """Returns appropriate icon based on services (list or set)"""
+        for service, icon in SERVICE_ICONS:
+            if service in services:
+                return icon
         return ""
 
-    def display_devices(self, devices: List[Dict]) -> None:
-        """Display list of devices in a table"""
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("Name", style="cyan")
-        table.add_column("Host", style="green")
-        table.add_column("Services", style="yellow")
-        table.add_column("Tags", style="blue")
-        table.add_column("Description", style="white")
+    def _render_device_table(self, devices: Iterable[Dict], numbered: bool = False) -> "Table":
+        """Build the standard device table, optionally with a # column"""
+        from rich.table import Table
 
-        for device in devices:
-            services = [s['service_name'] for s in device.get('services', [])]
-            service_icon = self.get_service_icon(services)
-            services_str = ", ".join(services)
-            tags = ", ".join([f"{tag['key']}:{tag['value']}" for tag in device.get('tags', [])])
-            description = device.get('description', '')
-            table.add_row(
+        table = Table(show_header=True, header_style="bold magenta")
+        if numbered:
+            table.add_column("#", style="dim", width=3)
+        for header, style in DEVICE_TABLE_COLUMNS:
+            table.add_column(header, style=style)
+
+        for i, device in enumerate(devices, 1):
+            service_icon = self.get_service_icon(device['_services_uc'])
+            row = [
                 f"{service_icon}{device['device_name']}",
                 device['host'],
-                services_str,
-                tags,
-                description
-            )
+                device['_services_str'],
+                device['_tags_str'],
+                device.get('description', '')
+            ]
+            if numbered:
+                row.insert(0, str(i))
+            table.add_row(*row)
 
-        self.console.print(table)
+        return table
+
+    def display_devices(self, devices: Iterable[Dict]) -> None:
+        """Display list of devices in a table"""
+        self.console.print(self._render_device_table(devices))
+
+    def _prompt_connect(self, results: List[Dict], interactive: bool = False, no_deploy: bool = False) -> None:
+        """Show search results and let the user pick a machine to connect to"""
+        if len(results) == 1:
+            self.display_devices(results)
+            self.console.print("\n[yellow]Press Enter to connect or 'n' to cancel[/yellow]")
+            response = input().lower()
+            if response != 'n':
+                self.connect_to_device(results[0], interactive, no_deploy)
+            return
+
+        self.console.print(self._render_device_table(results, numbered=True))
+        self.console.print("\n[yellow]Enter the number of the machine to connect to (or 'q' to quit)[/yellow]")
+
+        while True:
+            try:
+                choice = input("Choice: ").strip()
+                if choice.lower() == 'q':
+                    break
+
+                index = int(choice) - 1
+                if 0 <= index < len(results):
+                    self.connect_to_device(results[index], interactive, no_deploy)
+                    break
+                else:
+                    self.console.print("[red]Invalid number. Please try again.[/red]")
+            except ValueError:
+                self.console.print("[red]Please enter a valid number.[/red]")
 
     def update_history(self, device: Dict) -> None:
         """Update connection history"""
         try:
             history = []
             if self.history_file.exists():
-                with open(self.history_file, 'r') as f:
-                    history = json.load(f)
+                with open(self.history_file, 'rb') as f:
+                    history = json_loads(f.read())
 
             # Check if machine is already in history
             existing_index = next(
@@ -318,17 +873,32 @@ class WallixManager:
             # Keep only the last 10 connections
             history = history[:10]
 
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2)
+            atomic_write_bytes(self.history_file, json_dumps(history))
         except Exception as e:
             logger.error(f"Error updating history: {e}")
 
     def get_history(self) -> List[Dict]:
         """Retrieve connection history"""
         try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
+            if not self.history_file.exists():
+                return []
+            mtime_ns = self.history_file.stat().st_mtime_ns
+
+            # Fast path: reuse the parsed rows while the file is unchanged;
+            # the no-arg history display is the hottest CLI path
+            try:
+                cached_mtime, history = pickle.loads(self.history_cache_file.read_bytes())
+                if cached_mtime == mtime_ns:
+                    return history
+            except (OSError, pickle.PickleError, EOFError, ValueError):
+                pass
+
+            history = json_loads(self.history_file.read_bytes())
+            try:
+                atomic_write_bytes(self.history_cache_file, pickle.dumps((mtime_ns, history), protocol=5))
+            except OSError:
+                pass
+            return history
         except Exception as e:
             logger.error(f"Error reading history: {e}")
         return []
@@ -340,6 +910,9 @@ class WallixManager:
             logger.info("No connection history available")
             return
 
+        from rich.panel import Panel
+        from rich.table import Table
+
         table = Table(show_header=True, header_style="bold magenta")
         table.add_column("#", style="dim", width=3)
         table.add_column("Name", style="cyan")
@@ -379,10 +952,7 @@ class WallixManager:
 
                     index = int(choice) - 1
                     if 0 <= index < len(history):
-                        device = next(
-                            (d for d in self.get_devices() if d['device_name'] == history[index]['device_name']),
-                            None
-                        )
+                        device = self.find_device(history[index]['device_name'])
                         if device:
                             self.connect_to_device(device)
                             break
@@ -396,6 +966,33 @@ class WallixManager:
             print("\n")  # For a clean line break
             return
 
+    def _deploy_blob(self, path: Path) -> str:
+        """Return the base64 gzip blob for a deploy file, cached by (mtime, size)"""
+        if self._deploy_cache is None:
+            try:
+                self._deploy_cache = pickle.loads(self.deploy_cache_file.read_bytes())
+            except (OSError, pickle.PickleError, EOFError):
+                self._deploy_cache = {}
+
+        stat = path.stat()
+        cached = self._deploy_cache.get(str(path))
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        # compresslevel=6 is ~2x faster than the default 9 for a marginal size cost
+        content_base64 = base64.b64encode(gzip.compress(path.read_bytes(), compresslevel=6)).decode('utf-8')
+        self._deploy_cache[str(path)] = (stat.st_mtime, stat.st_size, content_base64)
+        self._deploy_cache_dirty = True
+        return content_base64
+
+    def _save_deploy_cache(self) -> None:
+        """Persist the deploy blob cache for the next run"""
+        try:
+            self.deploy_cache_file.write_bytes(pickle.dumps(self._deploy_cache, protocol=5))
+            self._deploy_cache_dirty = False
+        except OSError as e:
+            logger.error(f"Error saving deploy cache: {e}")
+
     def connect_to_device(self, device: Dict, interactive: bool = False, no_deploy: bool = False) -> None:
         """SSH connection to a device"""
         logger.info(f"Connecting to [bold blue]{device['device_name']}[/bold blue]...")
@@ -406,32 +1003,30 @@ class WallixManager:
         
         # Determine username
         username = "Interactive" if interactive else self.username
+        target = f"{username}@{device['device_name']}:SSH:{self.username}@{self.bastion_host}"
 
-        # Build SSH command
-        if no_deploy:
-            # Standard SSH connection
-            ssh_command = f"ssh -tt -A -p 22 {username}@{device['device_name']}:SSH:{self.username}@{self.bastion_host}"
-        elif interactive:
-            # Simple interactive mode
-            ssh_command = f"ssh -tt -A -p 22 {username}@{device['device_name']}:SSH:{self.username}@{self.bastion_host}"
-        else:
-            # Normal mode or interactive mode with file deployment
+        # Build SSH command as an argv list: no shell fork, no quoting of
+        # the (potentially large) deploy payload or the device name
+        ssh_argv = ["ssh", "-tt", "-A", "-p", "22", target]
+
+        if not no_deploy and not interactive:
+            # Normal mode with file deployment
             try:
                 # Prepare files in compressed base64
                 files_content = []
-                deploy_files = WALLIX_DEPLOY_FILES if WALLIX_DEPLOY_FILES else []
-                
+                deploy_files = self.deploy_files or []
+
                 for filename in deploy_files:
                     try:
-                        with open(script_dir / filename, 'rb') as f:
-                            content = f.read()
-                            content_gzip = gzip.compress(content)
-                            content_base64 = base64.b64encode(content_gzip).decode('utf-8')
-                            files_content.append(('/tmp/' + filename, content_base64))
+                        content_base64 = self._deploy_blob(script_dir / filename)
+                        files_content.append(('/tmp/' + filename, content_base64))
                     except FileNotFoundError as e:
                         logger.error(f"File not found: {e}")
                         continue
 
+                if self._deploy_cache_dirty:
+                    self._save_deploy_cache()
+
                 if files_content:
                     # Build deployment command
                     deploy_cmd = " && ".join([
@@ -447,27 +1042,19 @@ class WallixManager:
                 else:
                     deploy_cmd = "bash -l"
 
-                ssh_command = f"ssh -tt -A -p 22 {username}@{device['device_name']}:SSH:{self.username}@{self.bastion_host} '{deploy_cmd}'"
+                ssh_argv.append(deploy_cmd)
             except Exception as e:
                 logger.error(f"Error deploying files: {e}")
-                ssh_command = f"ssh -tt -A -p 22 {username}@{device['device_name']}:SSH:{self.username}@{self.bastion_host} 'bash -l'"
+                ssh_argv.append("bash -l")
 
-        subprocess.run(ssh_command, shell=True)
+        subprocess.run(ssh_argv)
 
     def update_device(self, device_name: str, description: str = None, tags: str = None) -> bool:
         """Update device description and tags"""
         try:
-            # Authentication required for update
-            if not self.authenticate():
-                logger.error("Authentication error")
-                return False
-
             # Retrieve device
             devices = self.get_devices()
-            device = next(
-                (d for d in devices if d['device_name'] == device_name),
-                None
-            )
+            device = self.find_device(device_name)
 
             if not device:
                 logger.error(f"Device '{device_name}' not found")
@@ -494,18 +1081,19 @@ class WallixManager:
                 update_data['tags'] = device.get('tags', [])
 
             # Update device using PUT
-            response = self.session.put(
+            response = self._request_with_auth_retry(
+                'put',
                 f"{self.devices_endpoint}/{device_name}",
-                auth=HTTPBasicAuth(self.username, self.password),
                 json=update_data,
-                verify=False,
                 timeout=10
             )
 
             if response.status_code in [200, 204]:
                 logger.info(f"Device '{device_name}' updated successfully")
-                # Refresh cache
-                self.get_devices(force_refresh=True)
+                # Patch the cached entry instead of re-downloading the full list
+                device['description'] = update_data['description']
+                device['tags'] = update_data['tags']
+                self.save_cache(devices)
                 return True
             else:
                 logger.error(f"Error updating device: {response.status_code}")
@@ -516,157 +1104,80 @@ class WallixManager:
             logger.error(f"Error updating device: {e}")
             return False
 
-    def search_devices(self, query: str = None, filter_regex: str = None, filter_services: str = None, filter_tags: str = None, interactive: bool = False, no_deploy: bool = False) -> List[Dict]:
+    def search_devices(self, query: str = None, filters: ParsedFilters = None, interactive: bool = False, no_deploy: bool = False, allow_refresh: bool = True, devices: List[Dict] = None) -> List[Dict]:
         """Search devices by name or host with optional filters"""
-        devices = self.get_devices()
-        if not query and not filter_regex and not filter_services and not filter_tags:
+        if devices is None:
+            devices = self.get_devices()
+        filters = filters or ParsedFilters()
+        if not query and not filters:
             return devices
 
         results = devices
 
         # Filter by regex if specified
-        if filter_regex:
-            import re
-            pattern = re.compile(filter_regex, re.IGNORECASE)
-            results = [d for d in results if pattern.search(d['device_name']) or pattern.search(d['host']) or pattern.search(d.get('description', ''))]
-
-        # Filter by services if specified
-        if filter_services:
-            required_services = [s.strip().upper() for s in filter_services.split(',')]
-            results = [d for d in results if all(s in [service['service_name'].upper() for service in d.get('services', [])] for s in required_services)]
+        if filters.filter_test is not None:
+            results = [d for d in results if filters.filter_test(d['_blob'])]
 
-        # Filter by tags if specified
-        if filter_tags:
-            required_tags = [t.strip().lower() for t in filter_tags.split(',')]
-            results = [d for d in results if all(t in [tag.lower() for tag in d.get('tags', [])] for t in required_tags)]
+        # Filter by services/tags, through the SQLite index on large catalogs
+        index_names = self._index_lookup(filters, len(devices))
+        if index_names is not None:
+            results = [d for d in results if d['device_name'] in index_names]
+        else:
+            if filters.services is not None:
+                results = [d for d in results if filters.services <= d['_services_uc']]
+            if filters.tags is not None:
+                results = [d for d in results if filters.tags <= d['_tags_lc']]
 
         # Filter by query if specified
         if query:
-            results = [
-                device for device in results
-                if query.lower() in device['device_name'].lower() or
-                query.lower() in device['host'].lower() or
-                query.lower() in device.get('description', '').lower()
-            ]
+            query_lc = query.lower()
+            results = [device for device in results if query_lc in device['_blob']]
 
         if results:
-            self.console.print(Panel.fit(f"[bold cyan]Search results[/bold cyan]"))
-
-            if len(results) == 1:
-                self.display_devices(results)
-                self.console.print("\n[yellow]Press Enter to connect or 'n' to cancel[/yellow]")
-                response = input().lower()
-                if response != 'n':
-                    self.connect_to_device(results[0], interactive, no_deploy)
-            else:
-                # Create interactive table
-                table = Table(show_header=True, header_style="bold magenta")
-                table.add_column("#", style="dim", width=3)
-                table.add_column("Name", style="cyan")
-                table.add_column("Host", style="green")
-                table.add_column("Services", style="yellow")
-                table.add_column("Tags", style="blue")
-                table.add_column("Description", style="white")
-
-                for i, device in enumerate(results, 1):
-                    services = [s['service_name'] for s in device.get('services', [])]
-                    service_icon = self.get_service_icon(services)
-                    services_str = ", ".join(services)
-                    tags = ", ".join([f"{tag['key']}:{tag['value']}" for tag in device.get('tags', [])])
-                    description = device.get('description', '')
-                    table.add_row(
-                        str(i),
-                        f"{service_icon}{device['device_name']}",
-                        device['host'],
-                        services_str,
-                        tags,
-                        description
-                    )
-
-                self.console.print(table)
-                self.console.print("\n[yellow]Enter the number of the machine to connect to (or 'q' to quit)[/yellow]")
-
-                while True:
-                    try:
-                        choice = input("Choice: ").strip()
-                        if choice.lower() == 'q':
-                            break
-
-                        index = int(choice) - 1
-                        if 0 <= index < len(results):
-                            self.connect_to_device(results[index], interactive, no_deploy)
-                            break
-                        else:
-                            self.console.print("[red]Invalid number. Please try again.[/red]")
-                    except ValueError:
-                        self.console.print("[red]Please enter a valid number.[/red]")
-        else:
-            logger.error("No devices found")
-            self.console.print("\n[yellow]Do you want to force cache refresh and try again? (y/n)[/yellow]")
-            response = input().lower() or 'y'  # 'y' by default if empty
-            if response == 'y':
-                if not self.authenticate():
-                    logger.error("Authentication error")
-                    return
-                devices = self.get_devices(force_refresh=True)
-                results = self.search_devices(query, filter_regex, filter_services, filter_tags, interactive, no_deploy)
-                if results:
-                    self.console.print(Panel.fit(f"[bold cyan]Search results[/bold cyan]"))
-                    if len(results) == 1:
-                        self.display_devices(results)
-                        self.console.print("\n[yellow]Press Enter to connect or 'n' to cancel[/yellow]")
-                        response = input().lower()
-                        if response != 'n':
-                            self.connect_to_device(results[0], interactive, no_deploy)
-                    else:
-                        # Create interactive table
-                        table = Table(show_header=True, header_style="bold magenta")
-                        table.add_column("#", style="dim", width=3)
-                        table.add_column("Name", style="cyan")
-                        table.add_column("Host", style="green")
-                        table.add_column("Services", style="yellow")
-                        table.add_column("Tags", style="blue")
-                        table.add_column("Description", style="white")
-
-                        for i, device in enumerate(results, 1):
-                            services = [s['service_name'] for s in device.get('services', [])]
-                            service_icon = self.get_service_icon(services)
-                            services_str = ", ".join(services)
-                            tags = ", ".join([f"{tag['key']}:{tag['value']}" for tag in device.get('tags', [])])
-                            description = device.get('description', '')
-                            table.add_row(
-                                str(i),
-                                f"{service_icon}{device['device_name']}",
-                                device['host'],
-                                services_str,
-                                tags,
-                                description
-                            )
-
-                        self.console.print(table)
-                        self.console.print("\n[yellow]Enter the number of the machine to connect to (or 'q' to quit)[/yellow]")
-
-                        while True:
-                            try:
-                                choice = input("Choice: ").strip()
-                                if choice.lower() == 'q':
-                                    break
-
-                                index = int(choice) - 1
-                                if 0 <= index < len(results):
-                                    self.connect_to_device(results[index], interactive, no_deploy)
-                                    break
-                                else:
-                                    self.console.print("[red]Invalid number. Please try again.[/red]")
-                            except ValueError:
-                                self.console.print("[red]Please enter a valid number.[/red]")
-                else:
-                    logger.error("No devices found after refresh")
+            from rich.panel import Panel
+            self.console.print(Panel.fit("[bold cyan]Search results[/bold cyan]"))
+            self._prompt_connect(results, interactive, no_deploy)
+            return results
+
+        if not allow_refresh:
+            logger.error("No devices found after refresh")
+            return results
+
+        logger.error("No devices found")
+        self.console.print("\n[yellow]Do you want to force cache refresh and try again? (y/n)[/yellow]")
+        response = prompt_yes_no()  # 'y' by default if empty
+        if response == 'y':
+            self.get_devices(force_refresh=True)
+            results = self.search_devices(query, filters, interactive, no_deploy, allow_refresh=False)
 
         return results
 
+def _try_connect(manager: WallixManager, name: str, interactive: bool = False, no_deploy: bool = False) -> None:
+    """Connect to a machine by name, offering one cache refresh on miss"""
+    device = manager.find_device(name)
+    if device:
+        manager.connect_to_device(device, interactive, no_deploy)
+        return
+
+    logger.error(f"Machine '{name}' not found")
+    logger.info("Do you want to force cache refresh and try again? (y/n)")
+    if prompt_yes_no() == 'y':
+        manager.get_devices(force_refresh=True)
+        device = manager.find_device(name)
+        if device:
+            manager.connect_to_device(device, interactive, no_deploy)
+        else:
+            logger.error("Machine not found after refresh")
+
 def main():
     try:
+        # Most common invocation: no arguments, just the history display.
+        # Skip importing and building the argparse machinery for it.
+        if len(sys.argv) == 1:
+            WallixManager().display_history()
+            sys.exit(0)
+
+        import argparse
         parser = argparse.ArgumentParser(description="Wallix connection manager")
         parser.add_argument(
             "-s", "--search",
@@ -703,6 +1214,11 @@ def main():
             help="Force cache refresh",
             action="store_true"
         )
+        parser.add_argument(
+            "--show-new",
+            help="Show machines added since the last cache (used with --force-refresh)",
+            action="store_true"
+        )
         parser.add_argument(
             "-i", "--interactive",
             help="Use Interactive account for connection",
@@ -738,21 +1254,22 @@ def main():
         args = parser.parse_args()
         manager = WallixManager()
 
+        # Normalize the filter options once; every branch reuses the parsed form
+        filters = ParsedFilters.from_args(args.filter, args.services, args.tags)
+
+        # Short-circuiting boolean, computed once instead of two any([...]) calls
+        action_chosen = bool(args.list or args.connect or args.search or args.force_refresh or args.update)
+
         # If a search term is provided without option, treat it as a search
-        if args.search_term and not any([args.list, args.connect, args.search, args.force_refresh, args.update]):
+        if args.search_term and not action_chosen:
             args.search = args.search_term
+            action_chosen = True
 
         # If no action is specified, display history
-        if not any([args.list, args.connect, args.search, args.force_refresh, args.update]):
+        if not action_chosen:
             manager.display_history()
             sys.exit(0)
 
-        # Authentication only needed if forcing refresh or updating
-        if args.force_refresh or args.update:
-            if not manager.authenticate():
-                logger.error("Authentication error")
-                sys.exit(1)
-
         # Update a device
         if args.update:
             if not args.description and not args.new_tags:
@@ -763,9 +1280,10 @@ def main():
 
         # Force cache refresh
         if args.force_refresh:
-            devices = manager.get_devices(force_refresh=True)
+            devices = manager.get_devices(force_refresh=True, show_new=args.show_new)
             if args.search:
-                manager.search_devices(args.search, args.filter, args.services, args.tags, args.interactive, args.no_deploy)
+                # Reuse the list we just refreshed instead of re-reading it
+                manager.search_devices(args.search, filters, args.interactive, args.no_deploy, devices=devices)
             elif args.list:
                 manager.display_devices(devices)
             sys.exit(0)
@@ -773,56 +1291,37 @@ def main():
         if args.list:
             devices = manager.get_devices(args.force_refresh)
 
-            # Filter by regex if specified
-            if args.filter:
-                import re
-                pattern = re.compile(args.filter, re.IGNORECASE)
-                devices = [d for d in devices if pattern.search(d['device_name']) or pattern.search(d['host']) or pattern.search(d.get('description', ''))]
-
-            # Filter by services if specified
-            if args.services:
-                required_services = [s.strip().upper() for s in args.services.split(',')]
-                devices = [d for d in devices if all(s in [service['service_name'].upper() for service in d.get('services', [])] for s in required_services)]
+            # Build the active filter predicates, then scan the list once
+            preds = []
+            if filters.filter_test is not None:
+                preds.append(lambda d, t=filters.filter_test: t(d['_blob']))
+            index_names = manager._index_lookup(filters, len(devices))
+            if index_names is not None:
+                preds.append(lambda d, names=index_names: d['device_name'] in names)
+            else:
+                if filters.services is not None:
+                    preds.append(lambda d, req=filters.services: req <= d['_services_uc'])
+                if filters.tags is not None:
+                    preds.append(lambda d, req=filters.tags: req <= d['_tags_lc'])
 
-            # Filter by tags if specified
-            if args.tags:
-                required_tags = [t.strip().lower() for t in args.tags.split(',')]
-                devices = [d for d in devices if all(t in [tag.lower() for tag in d.get('tags', [])] for t in required_tags)]
+            if preds:
+                # Generator: the table render below iterates exactly once,
+                # so no filtered copy of the list is ever materialized
+                devices = (d for d in devices if all(p(d) for p in preds))
 
+            from rich.panel import Panel
             manager.console.print(Panel.fit("[bold cyan]Available machines list[/bold cyan]"))
             manager.display_devices(devices)
 
         elif args.connect:
-            devices = manager.get_devices(args.force_refresh)
-            device = next(
-                (d for d in devices if d['device_name'] == args.connect),
-                None
-            )
-            if device:
-                manager.connect_to_device(device, args.interactive, args.no_deploy)
-            else:
-                logger.error(f"Machine '{args.connect}' not found")
-                logger.info("Do you want to force cache refresh and try again? (y/n)")
-                response = input().lower() or 'y'  # 'y' by default if empty
-                if response == 'y':
-                    if not manager.authenticate():
-                        logger.error("Authentication error")
-                        sys.exit(1)
-                    devices = manager.get_devices(force_refresh=True)
-                    device = next(
-                        (d for d in devices if d['device_name'] == args.connect),
-                        None
-                    )
-                    if device:
-                        manager.connect_to_device(device, args.interactive, args.no_deploy)
-                    else:
-                        logger.error("Machine not found after refresh")
+            manager.get_devices(args.force_refresh)
+            _try_connect(manager, args.connect, args.interactive, args.no_deploy)
         elif args.search:
             # Interactive mode by default with filters
-            manager.search_devices(args.search, args.filter, args.services, args.tags, args.interactive, args.no_deploy)
+            manager.search_devices(args.search, filters, args.interactive, args.no_deploy)
         else:
             # Interactive mode by default
-            manager.search_devices(None, args.filter, args.services, args.tags, args.interactive, args.no_deploy)
+            manager.search_devices(None, filters, args.interactive, args.no_deploy)
     except KeyboardInterrupt:
         print("\n")  # For a clean line break
         sys.exit(0)